@@ -1,3 +1,5 @@
+import logging
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,10 +7,28 @@ import plotly.express as px
 import plotly.graph_objects as go
 from neo4j import GraphDatabase
 
+logger = logging.getLogger(__name__)
+
 # Configuration
 NEO4J_URI = "bolt://localhost:8868"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "password"
+CACHE_TTL = 600  # seconds before cached Neo4j data is refreshed
+CURRENT_FISCAL_YEAR = "2024-25"
+CHART_CACHE_ENTRIES = 64  # cached results kept per chart/KPI builder
+MAX_TREND_POINTS = 1000  # per-line point budget for trend charts (~2x chart width in px)
+
+# Columns read by process_kpi_data; passing only these keeps its cache key cheap to hash
+KPI_INPUT_COLUMNS = ['domain', 'programme', 'project_name', 'total_budget', 'journal_articles',
+                     'conference_papers', 'book_chapters', 'technology_demonstrators']
+
+# Property indexes used by the dashboard queries
+NEO4J_INDEXES = [
+    "CREATE INDEX domain_name IF NOT EXISTS FOR (d:Domain) ON (d.name)",
+    "CREATE INDEX programme_name IF NOT EXISTS FOR (prog:Programme) ON (prog.name)",
+    "CREATE INDEX project_id IF NOT EXISTS FOR (p:Project) ON (p.id)",
+    "CREATE INDEX budget_fiscal_year IF NOT EXISTS FOR (b:Budget) ON (b.fiscal_year)",
+]
 
 # Set page configuration and theme
 st.set_page_config(layout="wide", page_title="Project Portfolio Dashboard")
@@ -54,28 +74,52 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-def connect_to_neo4j():
+def hash_dataframe(df):
+    """
+    Content hash for DataFrame arguments of cached builders
+    """
+    return hash((tuple(df.columns), pd.util.hash_pandas_object(df).values.tobytes()))
+
+# Memoize pure data/figure builders on their inputs so reruns only rebuild what changed
+cache_builder = st.cache_data(
+    hash_funcs={pd.DataFrame: hash_dataframe},
+    max_entries=CHART_CACHE_ENTRIES,
+    show_spinner=False
+)
+
+def ensure_indexes(driver):
+    """
+    Create the property indexes used by the dashboard queries if they are missing
+    """
     try:
-        return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        with driver.session() as session:
+            for statement in NEO4J_INDEXES:
+                session.run(statement).consume()
     except Exception as e:
-        st.error(f"Error connecting to Neo4j: {str(e)}")
-        return None
+        # Expected with read-only credentials; the queries still work without the indexes
+        logger.warning("Could not create Neo4j indexes: %s", e)
 
-def get_project_info(driver):
+@st.cache_resource(show_spinner=False)
+def get_driver(uri, user, password):
     """
-    Comprehensive project information query from Neo4j
+    Neo4j driver shared by all sessions and reruns for the lifetime of the process;
+    the dashboard indexes are ensured once when it is created
     """
-    if not driver:
-        return []
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    ensure_indexes(driver)
+    return driver
 
+def get_project_info(session, fiscal_year=CURRENT_FISCAL_YEAR):
+    """
+    Comprehensive project information query from Neo4j
+    """
     query = """
     MATCH (d:Domain)-[:CONTAINS_PROGRAMME]->(prog:Programme)-[:CONTAINS_PROJECT]->(p:Project)
     OPTIONAL MATCH (p)-[:BELONGS_TO_DEPARTMENT]->(dept:Department)
     OPTIONAL MATCH (p)-[:HAS_BUDGET]->(b:Budget)
-    WITH d, prog, p, dept,
-         collect(b) as budgets,
-         sum(b.amount) as total_budget,
-         count(CASE WHEN b.fiscal_year = '2024-25' THEN 1 END) as current_year_budget
+    WITH d, prog, p, dept, sum(b.amount) as total_budget
+    OPTIONAL MATCH (p)-[:HAS_BUDGET]->(current:Budget {fiscal_year: $fiscal_year})
+    WITH d, prog, p, dept, total_budget, count(current) > 0 as is_active
     RETURN
         d.name as domain,
         d.description as domain_description,
@@ -84,12 +128,8 @@ def get_project_info(driver):
         p.description as description,
         p.status as status,
         p.id as project_id,
+        elementId(p) as project_key,
         dept.name as department,
-        [b IN budgets | {
-            year: b.year,
-            amount: b.amount,
-            fiscal_year: b.fiscal_year
-        }] as budget_details,
         total_budget as total_budget,
         p.created_date as start_date,
         p.last_updated as last_updated,
@@ -102,20 +142,94 @@ def get_project_info(driver):
         p.current_communities_end_user_beneficiaries as current_beneficiaries,
         p.challenges_encountered_since_inception as challenges,
         p.themes_capability_progress_since_inception as progress,
-        current_year_budget > 0 as is_active,
+        is_active,
         p.journal_articles as journal_articles,
         p.conference_papers as conference_papers,
         p.book_chapters as book_chapters,
         p.technology_demonstrators as technology_demonstrators
     ORDER BY d.name, prog.name, p.name
     """
-    try:
-        with driver.session() as session:
-            result = session.run(query)
-            return [record.data() for record in result]
-    except Exception as e:
-        st.error(f"Error querying Neo4j: {str(e)}")
-        return []
+    return session.run(query, fiscal_year=fiscal_year).to_df()
+
+def get_budget_info(session):
+    """
+    One row per project budget, in long format
+    """
+    query = """
+    MATCH (prog:Programme)-[:CONTAINS_PROJECT]->(p:Project)-[:HAS_BUDGET]->(b:Budget)
+    RETURN
+        prog.name as programme,
+        p.id as project_id,
+        elementId(p) as project_key,
+        p.name as project_name,
+        b.year as year,
+        b.fiscal_year as fiscal_year,
+        b.amount as amount
+    ORDER BY programme, project_name, fiscal_year
+    """
+    budgets_df = session.run(query).to_df()
+
+    # Keep the columns even when no budgets come back
+    return budgets_df.reindex(columns=[
+        'programme', 'project_id', 'project_key', 'project_name', 'year', 'fiscal_year', 'amount'
+    ])
+
+def get_domain_rollup(session):
+    """
+    Domain-level budget, project and research output totals aggregated in Neo4j
+    """
+    query = """
+    MATCH (d:Domain)-[:CONTAINS_PROGRAMME]->(prog:Programme)-[:CONTAINS_PROJECT]->(p:Project)
+    OPTIONAL MATCH (p)-[:HAS_BUDGET]->(b:Budget)
+    WITH d, prog, p, sum(b.amount) as project_budget
+    RETURN
+        d.name as domain,
+        sum(project_budget) as total_budget,
+        count(p) as total_projects,
+        sum(CASE WHEN p.status = 1 THEN 1 ELSE 0 END) as active_projects,
+        sum(p.journal_articles) as journal_articles,
+        sum(p.conference_papers) as conference_papers,
+        sum(p.book_chapters) as book_chapters,
+        sum(p.technology_demonstrators) as technology_demonstrators
+    ORDER BY domain
+    """
+    return session.run(query).to_df()
+
+def get_programme_rollup(session):
+    """
+    Programme-level budget totals aggregated in Neo4j
+    """
+    query = """
+    MATCH (d:Domain)-[:CONTAINS_PROGRAMME]->(prog:Programme)-[:CONTAINS_PROJECT]->(p:Project)
+    OPTIONAL MATCH (p)-[:HAS_BUDGET]->(b:Budget)
+    WITH d, prog, p, sum(b.amount) as project_budget
+    RETURN
+        d.name as domain,
+        prog.name as programme,
+        sum(project_budget) as total_budget,
+        count(p) as total_projects
+    ORDER BY domain, programme
+    """
+    return session.run(query).to_df()
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner="Initializing...")
+def load_portfolio_data(uri, user, password):
+    """
+    Load project information, project budgets and the domain/programme rollups
+    in one Neo4j session, cached across reruns per connection. Connection and
+    query errors propagate (and so are not cached); the caller reports them once
+    """
+    with get_driver(uri, user, password).session() as session:
+        df = get_project_info(session)
+        budgets_df = get_budget_info(session)
+        domain_rollup = get_domain_rollup(session)
+        programme_rollup = get_programme_rollup(session)
+
+    if not df.empty:
+        # Low-cardinality labels as categoricals for cheaper grouping and filtering
+        df = df.astype({'domain': 'category', 'programme': 'category', 'department': 'category'})
+
+    return df, budgets_df, domain_rollup, programme_rollup
 
 def custom_metric(label, value):
     """
@@ -129,12 +243,13 @@ def custom_metric(label, value):
     """
     st.markdown(html, unsafe_allow_html=True)
 
+@cache_builder
 def process_kpi_data(df, level='domain'):
     """
     Process KPI data at different levels (domain, programme, or project)
     """
     if level == 'domain':
-        grouped = df.groupby('domain').agg({
+        grouped = df.groupby('domain', observed=True).agg({
             'total_budget': 'sum',
             'journal_articles': 'sum',
             'conference_papers': 'sum',
@@ -144,7 +259,7 @@ def process_kpi_data(df, level='domain'):
         grouped = grouped.rename(columns={'domain': 'name'})
 
     elif level == 'programme':
-        grouped = df.groupby(['domain', 'programme']).agg({
+        grouped = df.groupby(['domain', 'programme'], observed=True).agg({
             'total_budget': 'sum',
             'journal_articles': 'sum',
             'conference_papers': 'sum',
@@ -158,23 +273,21 @@ def process_kpi_data(df, level='domain'):
                      'conference_papers', 'book_chapters', 'technology_demonstrators']]
         grouped = grouped.rename(columns={'project_name': 'name'})
 
-    # Calculate KPI costs
+    # Calculate KPI costs (vectorized; zero counts give zero cost)
     kpi_columns = ['journal_articles', 'conference_papers', 'book_chapters', 'technology_demonstrators']
+    total_budget = grouped['total_budget'].to_numpy(dtype=float)
     for kpi in kpi_columns:
-        grouped[f'{kpi}_cost'] = grouped.apply(
-            lambda x: x['total_budget'] / x[kpi] if x[kpi] > 0 else 0,
-            axis=1
-        )
+        counts = grouped[kpi].to_numpy(dtype=float)
+        grouped[f'{kpi}_cost'] = np.where(counts > 0, total_budget / np.where(counts > 0, counts, 1), 0.0)
 
     # Calculate total KPIs and cost per KPI
-    grouped['total_kpis'] = grouped[kpi_columns].sum(axis=1)
-    grouped['cost_per_kpi'] = grouped.apply(
-        lambda x: x['total_budget'] / x['total_kpis'] if x['total_kpis'] > 0 else 0,
-        axis=1
-    )
+    grouped['total_kpis'] = np.asarray(grouped[kpi_columns].fillna(0), dtype=np.int64).sum(axis=1)
+    total_kpis = grouped['total_kpis'].to_numpy(dtype=float)
+    grouped['cost_per_kpi'] = np.where(total_kpis > 0, total_budget / np.where(total_kpis > 0, total_kpis, 1), 0.0)
 
     return grouped
 
+@cache_builder
 def create_kpi_stacked_bar(df, level):
     """
     Create a stacked bar chart for KPI visualization using plotly
@@ -197,15 +310,26 @@ def create_kpi_stacked_bar(df, level):
         'technology_demonstrators': 'Technology Demonstrators'
     }
 
+    # The name and overall totals are the same for every KPI trace, so format them once
+    hover_headers = [f"<b>{name}</b><br>" for name in df['name'].to_numpy()]
+    hover_footers = [
+        f"Total Budget: R{budget:,.2f}<br>" +
+        f"Total KPIs: {kpis}<br>" +
+        f"Overall Cost per KPI: R{cpk:,.2f}"
+        for budget, kpis, cpk in zip(
+            df['total_budget'].to_numpy(), df['total_kpis'].to_numpy(), df['cost_per_kpi'].to_numpy()
+        )
+    ]
+
     for kpi, color in kpi_colors.items():
         hover_text = [
-            f"<b>{row['name']}</b><br>" +
-            f"{kpi_names[kpi]}: {row[kpi]}<br>" +
-            f"Cost per {kpi_names[kpi]}: R{row[f'{kpi}_cost']:,.2f}<br>" +
-            f"Total Budget: R{row['total_budget']:,.2f}<br>" +
-            f"Total KPIs: {row['total_kpis']}<br>" +
-            f"Overall Cost per KPI: R{row['cost_per_kpi']:,.2f}"
-            for _, row in df.iterrows()
+            header +
+            f"{kpi_names[kpi]}: {count}<br>" +
+            f"Cost per {kpi_names[kpi]}: R{cost:,.2f}<br>" +
+            footer
+            for header, count, cost, footer in zip(
+                hover_headers, df[kpi].to_numpy(), df[f'{kpi}_cost'].to_numpy(), hover_footers
+            )
         ]
 
         fig.add_trace(go.Bar(
@@ -253,6 +377,7 @@ def create_kpi_stacked_bar(df, level):
 
     return fig
 
+@cache_builder
 def create_kpi_efficiency_chart(df, level):
     """
     Create a bar chart showing cost per KPI efficiency
@@ -260,11 +385,14 @@ def create_kpi_efficiency_chart(df, level):
     fig = go.Figure()
 
     hover_text = [
-        f"<b>{row['name']}</b><br>" +
-        f"Cost per KPI: R{row['cost_per_kpi']:,.2f}<br>" +
-        f"Total Budget: R{row['total_budget']:,.2f}<br>" +
-        f"Total KPIs: {row['total_kpis']}"
-        for _, row in df.iterrows()
+        f"<b>{name}</b><br>" +
+        f"Cost per KPI: R{cpk:,.2f}<br>" +
+        f"Total Budget: R{budget:,.2f}<br>" +
+        f"Total KPIs: {kpis}"
+        for name, cpk, budget, kpis in zip(
+            df['name'].to_numpy(), df['cost_per_kpi'].to_numpy(),
+            df['total_budget'].to_numpy(), df['total_kpis'].to_numpy()
+        )
     ]
 
     # Add bars for cost per KPI
@@ -306,12 +434,11 @@ def create_kpi_efficiency_chart(df, level):
 
     return fig
 
-def create_budget_breakdown_chart(budget_details):
-    """Creates a bar chart for budget breakdown"""
-    if not budget_details:
+def create_budget_breakdown_chart(budget_df):
+    """Creates a bar chart for budget breakdown from a project's budget rows"""
+    if budget_df.empty:
         return None
 
-    budget_df = pd.DataFrame(budget_details)
     budget_df = budget_df.sort_values('year')
 
     fig = go.Figure()
@@ -381,18 +508,23 @@ def create_research_output_chart(project):
 
     return fig
 
-def create_domain_budget_pie(df):
+@cache_builder
+def create_domain_budget_chart(domain_rollup):
     """
-    Creates a pie chart showing budget distribution across domains
+    Creates a horizontal bar chart showing budget distribution across domains from the domain rollup
     """
     try:
-        domain_budget = df.groupby('domain')['total_budget'].sum().reset_index()
-
-        fig = go.Figure(data=[go.Pie(
-            labels=domain_budget['domain'],
-            values=domain_budget['total_budget'],
-            hole=0.4,
-            marker_colors=px.colors.qualitative.Set3
+        # Ascending so the largest budget is drawn at the top
+        budget = domain_rollup.sort_values('total_budget')
+        palette = px.colors.qualitative.Set3
+
+        fig = go.Figure(data=[go.Bar(
+            x=budget['total_budget'],
+            y=budget['domain'],
+            orientation='h',
+            marker_color=[palette[i % len(palette)] for i in range(len(budget))],
+            text=[f"R{amount:,.0f}" for amount in budget['total_budget']],
+            textposition='auto',
         )])
 
         fig.update_layout(
@@ -400,30 +532,43 @@ def create_domain_budget_pie(df):
             paper_bgcolor='#2d2d2d',
             plot_bgcolor='#2d2d2d',
             font=dict(color='white'),
-            showlegend=True,
-            legend=dict(
-                bgcolor='#2d2d2d',
-                font=dict(color='white')
+            showlegend=False,
+            xaxis=dict(
+                title="Budget (R)",
+                gridcolor='#444444',
+                showgrid=True,
+                tickformat=",",
+            ),
+            yaxis=dict(
+                title="",
+                showgrid=False,
+                type='category'
             ),
             margin=dict(l=40, r=40, t=40, b=40)
         )
         return fig
     except Exception as e:
-        st.error(f"Error creating domain budget pie chart: {str(e)}")
+        st.error(f"Error creating domain budget chart: {str(e)}")
         return None
 
-def create_programme_budget_pie(df, domain):
+def create_programme_budget_chart(programme_rollup, domain):
     """
-    Creates a pie chart showing budget distribution across programmes within a domain
+    Creates a horizontal bar chart showing budget distribution across programmes within a domain
     """
     try:
-        programme_budget = df[df['domain'] == domain].groupby('programme')['total_budget'].sum().reset_index()
-
-        fig = go.Figure(data=[go.Pie(
-            labels=programme_budget['programme'],
-            values=programme_budget['total_budget'],
-            hole=0.4,
-            marker_colors=px.colors.qualitative.Set3
+        programme_budget = programme_rollup[programme_rollup['domain'] == domain]
+
+        # Ascending so the largest budget is drawn at the top
+        budget = programme_budget.sort_values('total_budget')
+        palette = px.colors.qualitative.Set3
+
+        fig = go.Figure(data=[go.Bar(
+            x=budget['total_budget'],
+            y=budget['programme'],
+            orientation='h',
+            marker_color=[palette[i % len(palette)] for i in range(len(budget))],
+            text=[f"R{amount:,.0f}" for amount in budget['total_budget']],
+            textposition='auto',
         )])
 
         fig.update_layout(
@@ -431,50 +576,94 @@ def create_programme_budget_pie(df, domain):
             paper_bgcolor='#2d2d2d',
             plot_bgcolor='#2d2d2d',
             font=dict(color='white'),
-            showlegend=True,
-            legend=dict(
-                bgcolor='#2d2d2d',
-                font=dict(color='white')
+            showlegend=False,
+            xaxis=dict(
+                title="Budget (R)",
+                gridcolor='#444444',
+                showgrid=True,
+                tickformat=",",
+            ),
+            yaxis=dict(
+                title="",
+                showgrid=False,
+                type='category'
             ),
             margin=dict(l=40, r=40, t=40, b=40)
         )
         return fig
     except Exception as e:
-        st.error(f"Error creating programme budget pie chart: {str(e)}")
+        st.error(f"Error creating programme budget chart: {str(e)}")
         return None
 
-def create_project_budget_trends(df, programme):
+def downsample_lttb(series_df, y_column, threshold=MAX_TREND_POINTS):
+    """
+    Reduce an ordered series to `threshold` rows with Largest-Triangle-Three-Buckets
+    """
+    n = len(series_df)
+    if threshold < 3 or n <= threshold:
+        return series_df
+
+    # Rows are already ordered, so positions stand in for (possibly categorical) x values
+    x = np.arange(n, dtype=float)
+    y = series_df[y_column].to_numpy(dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        a = selected[-1]
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        selected.append(start + int(area.argmax()))
+    selected.append(n - 1)
+
+    return series_df.iloc[selected]
+
+def create_project_budget_trends(df, budgets_df, programme):
     """
     Creates an area chart showing budget trends over years for projects in a programme
     """
     try:
-        prog_data = df[df['programme'] == programme].copy()
+        # Restrict to the (domain-filtered) programme's projects; names can repeat across domains
+        prog_keys = df.loc[df['programme'] == programme, 'project_key']
+        prog_budgets = budgets_df[
+            (budgets_df['programme'] == programme) & budgets_df['project_key'].isin(prog_keys)
+        ]
+        prog_budgets = prog_budgets.sort_values(['project_name', 'fiscal_year'])
 
         fig = go.Figure()
 
-        for idx, project in prog_data.iterrows():
-            if project['budget_details']:
-                budget_df = pd.DataFrame(project['budget_details'])
-                budget_df = budget_df.sort_values('fiscal_year')
-
-                fig.add_trace(go.Scatter(
-                    x=budget_df['fiscal_year'],
-                    y=budget_df['amount'],
-                    name=project['project_name'],
-                    fill='tonexty',
-                    mode='lines+markers',
-                    line=dict(width=2),
-                    marker=dict(size=8),
-                    hovertemplate=(
-                        "<b>%{text}</b><br>" +
-                        "Year: %{x}<br>" +
-                        "Budget: R%{y:,.2f}<br>"
-                    ),
-                    text=[project['project_name']] * len(budget_df)
-                ))
+        grouped = prog_budgets.groupby(['project_name', 'project_key'], sort=False, dropna=False)
+        for (project_name, _), budget_df in grouped:
+            budget_df = downsample_lttb(budget_df, 'amount')
+
+            fig.add_trace(go.Scattergl(
+                x=budget_df['fiscal_year'],
+                y=budget_df['amount'],
+                name=project_name,
+                fill='tonexty',
+                mode='lines+markers',
+                line=dict(width=2),
+                marker=dict(size=8),
+                hovertemplate=(
+                    "<b>%{text}</b><br>" +
+                    "Year: %{x}<br>" +
+                    "Budget: R%{y:,.2f}<br>"
+                ),
+                text=[project_name] * len(budget_df)
+            ))
 
         fig.update_layout(
             title=f"Project Budget Trends in {programme}",
+            hovermode='x unified',
             paper_bgcolor='#2d2d2d',
             plot_bgcolor='#2d2d2d',
             font=dict(color='white'),
@@ -504,53 +693,51 @@ def create_project_budget_trends(df, programme):
         st.error(f"Error creating project budget trends chart: {str(e)}")
         return None
 
-def create_domain_performance_chart(df):
+def compute_performance_scores(budgets, active, totals, outputs):
     """
-    Creates a bar chart showing performance analysis across domains
+    Weighted performance scores from per-domain float64 arrays of budget,
+    active projects, total projects and research outputs
     """
-    try:
-        domain_metrics = []
-        for domain in df['domain'].unique():
-            domain_data = df[df['domain'] == domain]
-
-            # Calculate performance metrics
-            total_budget = domain_data['total_budget'].sum()
-            active_projects = len(domain_data[domain_data['status'] == 1])
-            total_projects = len(domain_data)
-            research_output = (
-                domain_data['journal_articles'].sum() +
-                domain_data['conference_papers'].sum() +
-                domain_data['book_chapters'].sum() +
-                domain_data['technology_demonstrators'].sum()
-            )
+    budget_weight = 0.3
+    activity_weight = 0.3
+    output_weight = 0.4
+
+    budget_score = budgets / budgets.sum() * 100
+    activity_score = np.where(totals > 0, active / np.where(totals > 0, totals, 1) * 100, 0.0)
+    output_score = np.where(outputs > 0, outputs / (outputs.sum() or 1) * 100, 0.0)
+
+    performance_score = (
+        budget_score * budget_weight +
+        activity_score * activity_weight +
+        output_score * output_weight
+    )
 
-            # Calculate weighted performance score
-            budget_weight = 0.3
-            activity_weight = 0.3
-            output_weight = 0.4
-
-            budget_score = (total_budget / df['total_budget'].sum() * 100)
-            activity_score = (active_projects / total_projects * 100) if total_projects > 0 else 0
-            output_score = (research_output / (df['journal_articles'].sum() +
-                                             df['conference_papers'].sum() +
-                                             df['book_chapters'].sum() +
-                                             df['technology_demonstrators'].sum()) * 100) if research_output > 0 else 0
-
-            performance_score = (
-                budget_score * budget_weight +
-                activity_score * activity_weight +
-                output_score * output_weight
-            )
+    return budget_score, activity_score, output_score, performance_score
 
-            domain_metrics.append({
-                'domain': domain,
-                'performance_score': performance_score,
-                'budget_score': budget_score,
-                'activity_score': activity_score,
-                'output_score': output_score
-            })
+@cache_builder
+def create_domain_performance_chart(domain_rollup):
+    """
+    Creates a bar chart showing performance analysis across domains from the domain rollup
+    """
+    try:
+        # Calculate performance metrics for all domains at once
+        kpi_columns = ['journal_articles', 'conference_papers', 'book_chapters', 'technology_demonstrators']
+        total_budget = domain_rollup['total_budget'].to_numpy(dtype=float)
+        active_projects = domain_rollup['active_projects'].to_numpy(dtype=float)
+        total_projects = domain_rollup['total_projects'].to_numpy(dtype=float)
+        research_output = domain_rollup[kpi_columns].to_numpy(dtype=float).sum(axis=1)
+
+        budget_score, activity_score, output_score, performance_score = compute_performance_scores(
+            total_budget, active_projects, total_projects, research_output
+        )
 
-        domain_metrics_df = pd.DataFrame(domain_metrics)
+        domain_metrics_df = pd.DataFrame({
+            'domain': domain_rollup['domain'],
+            'performance_score': performance_score,
+            'budget_score': budget_score,
+            'activity_score': activity_score,
+            'output_score': output_score
+        })
 
         fig = go.Figure()
 
@@ -595,7 +782,7 @@ def create_domain_performance_chart(df):
         st.error(f"Error creating domain performance chart: {str(e)}")
         return None
 
-def display_project_details(df, programme):
+def display_project_details(df, budgets_df, programme):
     """
     Displays detailed information for all projects in a programme
     """
@@ -603,11 +790,18 @@ def display_project_details(df, programme):
         # Filter data for the selected programme
         prog_data = df[df['programme'] == programme]
 
+        prog_budgets = budgets_df[budgets_df['programme'] == programme]
+
         # Create a container for project details
         st.markdown("### Projects in Programme")
 
         for idx, project in prog_data.iterrows():
-            with st.expander(f"Project: {project['project_name']}"):
+            # Track open state so collapsed projects skip building their content and charts
+            expander = st.expander(f"Project: {project['project_name']}", key=f"project_{project['project_key']}", on_change="rerun")
+            if not expander.open:
+                continue
+
+            with expander:
                 # First row: Description and Status
                 col1, col2, col3 = st.columns([1, 1, 1])
 
@@ -632,8 +826,9 @@ def display_project_details(df, programme):
                     st.write(project['department'])
 
                     # Create and display budget breakdown chart with unique key
-                    if project['budget_details']:
-                        budget_chart = create_budget_breakdown_chart(project['budget_details'])
+                    project_budgets = prog_budgets[prog_budgets['project_key'] == project['project_key']]
+                    if not project_budgets.empty:
+                        budget_chart = create_budget_breakdown_chart(project_budgets)
                         if budget_chart:
                             st.plotly_chart(budget_chart, use_container_width=True, key=f"budget_{idx}")
 
@@ -652,45 +847,35 @@ def display_project_details(df, programme):
 def main():
     st.title("FDCR Portfolio Dashboard")
 
-    # Initialize session state
-    if 'project_info' not in st.session_state:
-        with st.spinner("Initializing..."):
-            driver = connect_to_neo4j()
-            if driver:
-                st.session_state.project_info = get_project_info(driver)
-                driver.close()
-                if st.session_state.project_info:
-                    st.session_state.df = pd.DataFrame(st.session_state.project_info)
-                else:
-                    st.error("No project data available")
-                    return
-            else:
-                st.error("Could not connect to database")
-                return
+    # Load project data and rollups (cached across reruns; failures raise and are not cached)
+    try:
+        df, budgets_df, domain_rollup, programme_rollup = load_portfolio_data(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    except Exception as e:
+        st.error(f"Error querying Neo4j: {str(e)}")
+        return
+
+    if df.empty or domain_rollup.empty or programme_rollup.empty:
+        # Don't keep a failed load cached; retry on the next rerun
+        load_portfolio_data.clear()
+        st.error("No project data available")
+        return
 
     # Domain filter
     domain_filter = st.selectbox(
         "Select Domain",
-        ["All"] + list(st.session_state.df['domain'].unique())
+        ["All"] + list(df['domain'].unique())
     )
 
-    # Filter data
-    filtered_df = st.session_state.df.copy()
+    # Filter data (downstream code never mutates it, so no copy is needed)
+    filtered_df = df if domain_filter == "All" else df[df['domain'] == domain_filter]
 
     if domain_filter != "All":
-        filtered_df = filtered_df[filtered_df['domain'] == domain_filter]
-
-        # Domain-specific view
-        domain_data = filtered_df
-        domain_budget = domain_data['total_budget'].sum()
-        active_projects = len(domain_data[domain_data['status'] == 1])
-        total_projects = len(domain_data)
-        research_outputs = (
-            domain_data['journal_articles'].sum() +
-            domain_data['conference_papers'].sum() +
-            domain_data['book_chapters'].sum() +
-            domain_data['technology_demonstrators'].sum()
-        )
+
+        # Domain-specific view, read from the cached domain rollup
+        domain_data = domain_rollup[domain_rollup['domain'] == domain_filter].iloc[0]
+        domain_budget = domain_data['total_budget']
+        active_projects = domain_data['active_projects']
+        total_projects = domain_data['total_projects']
 
         # Domain metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -702,24 +887,24 @@ def main():
         with col4:
             programme_selector = st.selectbox(
                 "Select Programme",
-                filtered_df['programme'].unique(),
+                filtered_df['programme'].unique().tolist(),
                 key="programme_selector"
             )
 
         # Display project details and visualizations for selected programme
         if programme_selector:
-            display_project_details(filtered_df, programme_selector)
+            display_project_details(filtered_df, budgets_df, programme_selector)
 
             st.markdown("### Programme Analysis")
             col1, col2 = st.columns(2)
 
             with col1:
-                budget_trends_chart = create_project_budget_trends(filtered_df, programme_selector)
+                budget_trends_chart = create_project_budget_trends(filtered_df, budgets_df, programme_selector)
                 if budget_trends_chart:
                     st.plotly_chart(budget_trends_chart, use_container_width=True)
 
             with col2:
-                prog_budget_chart = create_programme_budget_pie(filtered_df, domain_filter)
+                prog_budget_chart = create_programme_budget_chart(programme_rollup, domain_filter)
                 if prog_budget_chart:
                     st.plotly_chart(prog_budget_chart, use_container_width=True)
 
@@ -736,7 +921,7 @@ def main():
 
         # Process KPI data based on selected level and filters
         level = kpi_level.lower()
-        kpi_df = process_kpi_data(filtered_df, level)
+        kpi_df = process_kpi_data(filtered_df[KPI_INPUT_COLUMNS], level)
 
         # Display KPI Summary Metrics
         col1, col2, col3 = st.columns(3)
@@ -780,17 +965,8 @@ def main():
 
         # Detailed KPI Table
         with st.expander("View Detailed KPI Data"):
-            # Format the dataframe for display
-            display_df = kpi_df.copy()
-
-            # Format currency columns
-            currency_columns = ['total_budget', 'journal_articles_cost', 'conference_papers_cost',
-                              'book_chapters_cost', 'technology_demonstrators_cost', 'cost_per_kpi']
-            for col in currency_columns:
-                display_df[col] = display_df[col].apply(lambda x: f"R{x:,.2f}")
-
             # Rename columns for better readability
-            display_df = display_df.rename(columns={
+            column_names = {
                 'name': 'Name',
                 'total_budget': 'Total Budget',
                 'journal_articles': 'Journal Articles',
@@ -803,7 +979,14 @@ def main():
                 'conference_papers_cost': 'Cost per Conference',
                 'book_chapters_cost': 'Cost per Book',
                 'technology_demonstrators_cost': 'Cost per Tech Demo'
-            })
+            }
+
+            # Format currency columns at render time so they stay numeric (and sortable)
+            currency_columns = ['total_budget', 'journal_articles_cost', 'conference_papers_cost',
+                              'book_chapters_cost', 'technology_demonstrators_cost', 'cost_per_kpi']
+            display_df = kpi_df.rename(columns=column_names).style.format(
+                {column_names[col]: 'R{:,.2f}' for col in currency_columns}
+            )
 
             st.dataframe(
                 display_df,
@@ -813,9 +996,9 @@ def main():
 
     else:
         # Overview metrics
-        total_budget = filtered_df['total_budget'].sum()
-        num_domains = filtered_df['domain'].nunique()
-        total_programmes = filtered_df['programme'].nunique()
+        total_budget = domain_rollup['total_budget'].sum()
+        num_domains = len(domain_rollup)
+        total_programmes = programme_rollup['programme'].nunique()
 
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -828,12 +1011,12 @@ def main():
         # Overview visualizations
         col1, col2 = st.columns(2)
         with col1:
-            budget_chart = create_domain_budget_pie(filtered_df)
+            budget_chart = create_domain_budget_chart(domain_rollup)
             if budget_chart:
                 st.plotly_chart(budget_chart, use_container_width=True)
 
         with col2:
-            performance_chart = create_domain_performance_chart(filtered_df)
+            performance_chart = create_domain_performance_chart(domain_rollup)
             if performance_chart:
                 st.plotly_chart(performance_chart, use_container_width=True)
 